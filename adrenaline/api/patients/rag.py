@@ -2,6 +2,7 @@
 
 import asyncio
 import logging
+import math
 from typing import Any, Dict, List, Tuple
 
 import chromadb
@@ -11,6 +12,8 @@ import httpx
 # Configuration
 EMBEDDING_SERVICE_URL = "http://localhost:8004/embeddings"
 NER_SERVICE_URL = "http://clinical-ner-service-dev:8000/extract_entities"
+# Bound on in-flight NER requests so a large cohort doesn't flood the service
+MAX_CONCURRENT_NER_REQUESTS = 8
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -24,13 +27,19 @@ class EmbeddingManager:
         self.client = httpx.AsyncClient(timeout=60.0)
 
     async def get_embedding(self, text: str) -> List[float]:
-        """Get the embedding for a text."""
+        """Get the L2-normalized embedding for a text.
+
+        The notes collection uses inner product distance over normalized
+        vectors, so queries are normalized the same way.
+        """
         response = await self.client.post(
             self.embedding_service_url,
             json={"texts": [text], "instruction": "Represent the query for retrieval:"},
         )
         response.raise_for_status()
-        return response.json()["embeddings"][0]
+        embedding = response.json()["embeddings"][0]
+        norm = math.sqrt(sum(value * value for value in embedding)) or 1.0
+        return [value / norm for value in embedding]
 
     async def close(self):
         """Close the client."""
@@ -44,13 +53,15 @@ class NERManager:
         """Initialize the NER manager."""
         self.ner_service_url = ner_service_url
         self.client = httpx.AsyncClient(timeout=300.0)
+        self.semaphore = asyncio.Semaphore(MAX_CONCURRENT_NER_REQUESTS)
 
     async def extract_entities(self, text: str) -> Dict[str, Any]:
         """Extract entities from a text."""
-        response = await self.client.post(
-            self.ner_service_url,
-            json={"text": text},
-        )
+        async with self.semaphore:
+            response = await self.client.post(
+                self.ner_service_url,
+                json={"text": text},
+            )
         response.raise_for_status()
         return response.json()
 
@@ -167,13 +178,18 @@ class RAGManager:
         )
         logger.info(f"Retrieved {len(search_results)} relevant notes")
 
-        # Extract entities from the query
-        query_entities = await self.ner_manager.extract_entities(user_query)
+        # Extract entities from the query and the retrieved notes in one round
+        query_entities, *notes_entities = await asyncio.gather(
+            self.ner_manager.extract_entities(user_query),
+            *(
+                self.ner_manager.extract_entities(result["note_text"])
+                for result in search_results
+            ),
+        )
 
-        # Extract entities from the retrieved notes and filter based on matched entities
+        # Filter the retrieved notes based on matched entities
         filtered_results = []
-        for result in search_results:
-            note_entities = await self.ner_manager.extract_entities(result["note_text"])
+        for result, note_entities in zip(search_results, notes_entities):
             matching_entities = set(query_entities.keys()) & set(note_entities.keys())
             if matching_entities:
                 result["matching_entities"] = list(matching_entities)
@@ -201,15 +217,20 @@ class RAGManager:
         cohort_results = await self.chroma_manager.cohort_search(query_embedding, top_k)
         logger.info(f"Retrieved {len(cohort_results)} cohort search results")
 
-        # Extract entities from the query
-        query_entities = await self.ner_manager.extract_entities(user_query)
+        # Extract entities from the query and the cohort notes in one round
+        query_entities, *notes_entities = await asyncio.gather(
+            self.ner_manager.extract_entities(user_query),
+            *(
+                self.ner_manager.extract_entities(note_details["note_text"])
+                for _, note_details in cohort_results
+            ),
+        )
 
         # Filter and sort results based on matching entities
         filtered_results = []
-        for patient_id, note_details in cohort_results:
-            note_entities = await self.ner_manager.extract_entities(
-                note_details["note_text"]
-            )
+        for (patient_id, note_details), note_entities in zip(
+            cohort_results, notes_entities
+        ):
             matching_entities = set(query_entities.keys()) & set(note_entities.keys())
             if matching_entities:
                 note_details["matching_entities"] = list(matching_entities)
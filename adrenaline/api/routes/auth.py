@@ -1,5 +1,6 @@
 """Authentication routes."""
 
+import asyncio
 import logging
 from datetime import timedelta
 from typing import Any, Dict, List
@@ -12,6 +13,7 @@ from api.users.auth import (
     authenticate_user,
     create_access_token,
     get_current_active_user,
+    require_admin,
 )
 from api.users.crud import (
     create_user,
@@ -20,7 +22,12 @@ from api.users.crud import (
     update_user,
     update_user_password,
 )
-from api.users.data import User, UserCreate
+from api.users.data import (
+    SignInRequest,
+    UpdatePasswordRequest,
+    User,
+    UserCreate,
+)
 from api.users.db import get_async_session
 from api.users.utils import verify_password
 
@@ -34,7 +41,7 @@ router = APIRouter()
 
 @router.post("/auth/signin")
 async def signin(
-    request: Request,
+    credentials: SignInRequest,
     db: AsyncSession = Depends(get_async_session),  # noqa: B008
 ) -> Dict[str, Any]:
     """
@@ -42,8 +49,8 @@ async def signin(
 
     Parameters
     ----------
-    request : Request
-        The incoming request object.
+    credentials : SignInRequest
+        The username and password to authenticate.
     db : AsyncSession
         The database session.
 
@@ -55,19 +62,9 @@ async def signin(
     Raises
     ------
     HTTPException
-        If the credentials are invalid or missing.
+        If the credentials are invalid.
     """
-    data = await request.json()
-    username = data.get("username")
-    password = data.get("password")
-
-    if not username or not password:
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail="Username and password are required",
-        )
-
-    user = await authenticate_user(db, username, password)
+    user = await authenticate_user(db, credentials.username, credentials.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -158,7 +155,7 @@ async def get_session(
 @router.post("/auth/signup", response_model=User)
 async def signup(
     user: UserCreate,
-    current_user: User = Depends(get_current_active_user),  # noqa: B008
+    current_user: User = Depends(require_admin),  # noqa: B008
     db: AsyncSession = Depends(get_async_session),  # noqa: B008
 ) -> User:
     """
@@ -169,7 +166,7 @@ async def signup(
     user : UserCreate
         The user data to create.
     current_user : User
-        The current authenticated user.
+        The current authenticated admin user.
     db : AsyncSession
         The asynchronous database session.
 
@@ -183,17 +180,12 @@ async def signup(
     HTTPException
         If the current user is not an admin.
     """
-    if current_user.role != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to create users",
-        )
     return await create_user(db=db, user=user)
 
 
 @router.get("/users", response_model=List[User])
 async def get_users_(
-    current_user: User = Depends(get_current_active_user),  # noqa: B008
+    current_user: User = Depends(require_admin),  # noqa: B008
     skip: int = 0,
     limit: int = 100,
     db: AsyncSession = Depends(get_async_session),  # noqa: B008
@@ -204,7 +196,7 @@ async def get_users_(
     Parameters
     ----------
     current_user : User
-        The current authenticated user.
+        The current authenticated admin user.
     skip : int, optional
         The number of users to skip, by default 0.
     limit : int, optional
@@ -222,10 +214,6 @@ async def get_users_(
     HTTPException
         If the current user is not an admin.
     """
-    if current_user.role != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view users"
-        )
     return list(await get_users(db, skip=skip, limit=limit))
 
 
@@ -233,7 +221,7 @@ async def get_users_(
 async def update_user_(
     user_id: int,
     user_update: UserCreate,
-    current_user: User = Depends(get_current_active_user),  # noqa: B008
+    current_user: User = Depends(require_admin),  # noqa: B008
     db: AsyncSession = Depends(get_async_session),  # noqa: B008
 ) -> User:
     """
@@ -246,7 +234,7 @@ async def update_user_(
     user_update : UserCreate
         The updated user data.
     current_user : User
-        The current authenticated user.
+        The current authenticated admin user.
     db : AsyncSession
         The asynchronous database session.
 
@@ -260,17 +248,12 @@ async def update_user_(
     HTTPException
         If the current user is not an admin.
     """
-    if current_user.role != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to update users",
-        )
     return await update_user(db=db, user_id=user_id, user_update=user_update)
 
 
 @router.post("/auth/update-password")
 async def update_password(
-    request: Request,
+    passwords: UpdatePasswordRequest,
     current_user: User = Depends(get_current_active_user),  # noqa: B008
     db: AsyncSession = Depends(get_async_session),  # noqa: B008
 ) -> Dict[str, str]:
@@ -279,8 +262,8 @@ async def update_password(
 
     Parameters
     ----------
-    request : Request
-        The incoming request object.
+    passwords : UpdatePasswordRequest
+        The current and new passwords.
     current_user : User
         The current authenticated user.
     db : AsyncSession
@@ -296,24 +279,16 @@ async def update_password(
     HTTPException
         If the current password is incorrect or the new password is invalid.
     """
-    data = await request.json()
-    current_password = data.get("currentPassword")
-    new_password = data.get("newPassword")
-
-    if not current_password or not new_password:
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail="Current password and new password are required",
-        )
-
-    if not verify_password(current_password, current_user.hashed_password):
+    if not await asyncio.to_thread(
+        verify_password, passwords.current_password, current_user.hashed_password
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect current password",
         )
 
     try:
-        await update_user_password(db, current_user.id, new_password)
+        await update_user_password(db, current_user.id, passwords.new_password)
         await db.commit()
     except HTTPException as he:
         # Re-raise HTTP exceptions
@@ -331,7 +306,7 @@ async def update_password(
 @router.delete("/users/{user_id}")
 async def delete_user_(
     user_id: int,
-    current_user: User = Depends(get_current_active_user),  # noqa: B008
+    current_user: User = Depends(require_admin),  # noqa: B008
     db: AsyncSession = Depends(get_async_session),  # noqa: B008
 ) -> Dict[str, str]:
     """
@@ -342,7 +317,7 @@ async def delete_user_(
     user_id : int
         The ID of the user to delete.
     current_user : User
-        The current authenticated user.
+        The current authenticated admin user.
     db : AsyncSession
         The asynchronous database session.
 
@@ -356,12 +331,6 @@ async def delete_user_(
     HTTPException
         If the current user is not an admin or if the user is not found.
     """
-    if current_user.role != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to delete users",
-        )
-
     success = await delete_user(db=db, user_id=user_id)
     if success:
         return {"message": "User deleted successfully"}
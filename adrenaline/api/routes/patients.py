@@ -1,10 +1,11 @@
 """Patient data API routes."""
 
+import hashlib
 import logging
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Union
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from api.patients.data import ClinicalNote, Event, PatientData, QAPair
@@ -33,10 +34,54 @@ MEDS_DATA_DIR = os.getenv(
     "MEDS_DATA_DIR", "/mnt/data/odyssey/meds/hosp/merge_to_MEDS_cohort/train"
 )
 
+# Clinical notes are immutable once loaded, so clients may cache them
+NOTE_CACHE_CONTROL = "private, max-age=3600"
+
 # Initialize the lazy DataFrame
 init_lazy_df(MEDS_DATA_DIR)
 
 
+def _note_etag(content: str) -> str:
+    """
+    Compute a strong ETag for a representation of a clinical note.
+
+    Parameters
+    ----------
+    content : str
+        The note as served, e.g. its raw text or its serialized JSON.
+
+    Returns
+    -------
+    str
+        The quoted ETag value.
+    """
+    digest = hashlib.sha1(content.encode("utf-8"), usedforsecurity=False)
+    return f'"{digest.hexdigest()}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """
+    Check whether the request's If-None-Match header matches an ETag.
+
+    Parameters
+    ----------
+    request : Request
+        The incoming request.
+    etag : str
+        The current ETag of the resource.
+
+    Returns
+    -------
+    bool
+        True if the client already holds the current representation.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
 @router.get(
     "/patient_data/{patient_id}/events/{event_type}", response_model=List[Event]
 )
@@ -167,9 +212,11 @@ async def get_patient_data(
 async def get_patient_note(
     patient_id: int,
     note_id: str,
+    request: Request,
+    response: Response,
     db: AsyncIOMotorDatabase[Any] = Depends(get_database),  # noqa: B008
     current_user: User = Depends(get_current_active_user),  # noqa: B008
-) -> ClinicalNote:
+) -> Union[ClinicalNote, Response]:
     """
     Retrieve a specific clinical note for a patient.
 
@@ -179,6 +226,10 @@ async def get_patient_note(
         The ID of the patient.
     note_id : str
         The ID of the note to retrieve.
+    request : Request
+        The incoming request, checked for an If-None-Match header.
+    response : Response
+        The outgoing response, used to set caching headers.
     db : AsyncIOMotorDatabase
         The database connection.
     current_user : User
@@ -186,8 +237,9 @@ async def get_patient_note(
 
     Returns
     -------
-    ClinicalNote
-        The clinical note.
+    Union[ClinicalNote, Response]
+        The clinical note, or an empty 304 response if the client's
+        cached copy is still current.
     """
     try:
         patient = await db.patients.find_one(
@@ -200,8 +252,15 @@ async def get_patient_note(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Clinical note not found"
             )
 
-        note = patient["notes"][0]
-        return ClinicalNote(**note)
+        clinical_note = ClinicalNote(**patient["notes"][0])
+        # Hash every served field so metadata-only changes also invalidate
+        etag = _note_etag(clinical_note.model_dump_json())
+        headers = {"ETag": etag, "Cache-Control": NOTE_CACHE_CONTROL}
+        if _etag_matches(request, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response.headers.update(headers)
+        return clinical_note
 
     except HTTPException:
         raise
@@ -219,9 +278,11 @@ async def get_patient_note(
 async def get_raw_clinical_note(
     patient_id: int,
     note_id: str,
+    request: Request,
+    response: Response,
     db: AsyncIOMotorDatabase[Any] = Depends(get_database),  # noqa: B008
     current_user: User = Depends(get_current_active_user),  # noqa: B008
-) -> str:
+) -> Union[str, Response]:
     """
     Retrieve the raw text of a specific clinical note by its ID.
 
@@ -231,6 +292,10 @@ async def get_raw_clinical_note(
         The ID of the patient.
     note_id : str
         The ID of the note to retrieve.
+    request : Request
+        The incoming request, checked for an If-None-Match header.
+    response : Response
+        The outgoing response, used to set caching headers.
     db : AsyncIOMotorDatabase
         The database connection.
     current_user : User
@@ -238,8 +303,9 @@ async def get_raw_clinical_note(
 
     Returns
     -------
-    str
-        The raw text of the clinical note.
+    Union[str, Response]
+        The raw text of the clinical note, or an empty 304 response if the
+        client's cached copy is still current.
     """
     try:
         patient = await db.patients.find_one(
@@ -252,7 +318,14 @@ async def get_raw_clinical_note(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Medical note not found"
             )
 
-        return patient["notes"][0]["text"]
+        note_text = patient["notes"][0]["text"]
+        etag = _note_etag(note_text)
+        headers = {"ETag": etag, "Cache-Control": NOTE_CACHE_CONTROL}
+        if _etag_matches(request, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response.headers.update(headers)
+        return note_text
     except HTTPException:
         raise
     except Exception as e:
@@ -1,5 +1,6 @@
 """Authentication and authorization utilities."""
 
+import asyncio
 import os
 from datetime import datetime, timedelta
 from typing import Any, Dict, Optional
@@ -49,7 +50,7 @@ async def authenticate_user(
     user = await get_user_by_username(db, username)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await asyncio.to_thread(verify_password, password, user.hashed_password):
         return None
     return user
 
@@ -146,3 +147,32 @@ async def get_current_active_user(
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+
+async def require_admin(
+    current_user: User = Depends(get_current_active_user),  # noqa: B008
+) -> User:
+    """
+    Get the current active user, requiring the admin role.
+
+    Parameters
+    ----------
+    current_user : User
+        The current active user.
+
+    Returns
+    -------
+    User
+        The current active user, who is an admin.
+
+    Raises
+    ------
+    HTTPException
+        If the user is not an admin.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to perform this action",
+        )
+    return current_user
@@ -1,9 +1,11 @@
 """CRUD operations for user management."""
 
+import asyncio
 from typing import List, Optional
 
 from fastapi import HTTPException
 from sqlalchemy import Boolean, Column, Integer, String, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.users.data import User, UserCreate
@@ -121,7 +123,7 @@ async def create_user(db: AsyncSession, user: UserCreate) -> User:
     User
         The created user object.
     """
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await asyncio.to_thread(get_password_hash, user.password)
     db_user = UserModel(
         username=user.username,
         email=user.email,
@@ -167,7 +169,9 @@ async def update_user(db: AsyncSession, user_id: int, user_update: UserCreate) -
     db_user.email = user_update.email
     db_user.role = user_update.role
     if user_update.password:
-        db_user.hashed_password = get_password_hash(user_update.password)
+        db_user.hashed_password = await asyncio.to_thread(
+            get_password_hash, user_update.password
+        )
 
     await db.commit()
     await db.refresh(db_user)
@@ -190,7 +194,8 @@ async def create_initial_admin(db: AsyncSession) -> User:
     """
     admin_user = await get_user_by_username(db, username="admin")
     if not admin_user:
-        hashed_password = get_password_hash("admin_password")  # Use a secure password
+        # Use a secure password
+        hashed_password = await asyncio.to_thread(get_password_hash, "admin_password")
         admin_user = UserModel(
             username="admin",
             email="admin@example.com",
@@ -199,7 +204,15 @@ async def create_initial_admin(db: AsyncSession) -> User:
             role="admin",
         )
         db.add(admin_user)
-        await db.commit()
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Another worker process created the admin user concurrently
+            await db.rollback()
+            existing_admin = await get_user_by_username(db, username="admin")
+            if existing_admin is None:
+                raise
+            return existing_admin
         await db.refresh(admin_user)
     return User.from_orm(admin_user)
 
@@ -256,5 +269,5 @@ async def update_user_password(
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.hashed_password = get_password_hash(new_password)
+    user.hashed_password = await asyncio.to_thread(get_password_hash, new_password)
     db.add(user)
@@ -2,7 +2,7 @@
 
 from typing import Optional
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 
 
 class Token(BaseModel):
@@ -34,6 +34,38 @@ class TokenData(BaseModel):
     username: Optional[str] = None
 
 
+class SignInRequest(BaseModel):
+    """
+    Request body for signing in.
+
+    Attributes
+    ----------
+    username : str
+        The username to authenticate.
+    password : str
+        The plain text password to verify.
+    """
+
+    username: str = Field(..., min_length=1)
+    password: str = Field(..., min_length=1)
+
+
+class UpdatePasswordRequest(BaseModel):
+    """
+    Request body for updating the current user's password.
+
+    Attributes
+    ----------
+    current_password : str
+        The user's current password, sent as ``currentPassword``.
+    new_password : str
+        The new password to set, sent as ``newPassword``.
+    """
+
+    current_password: str = Field(..., alias="currentPassword", min_length=1)
+    new_password: str = Field(..., alias="newPassword", min_length=1)
+
+
 class UserBase(BaseModel):
     """
     Base model for user data.
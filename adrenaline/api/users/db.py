@@ -2,14 +2,31 @@
 
 from typing import Any, AsyncGenerator
 
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
 
 
 # Use a local SQLite database
 DATABASE_URL = "sqlite+aiosqlite:///./users.db"
+# Seconds a connection waits on another server worker's write lock before
+# failing with "database is locked"
+BUSY_TIMEOUT = 30
+
+engine = create_async_engine(
+    DATABASE_URL, echo=False, connect_args={"timeout": BUSY_TIMEOUT}
+)
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def set_sqlite_pragma(dbapi_connection: Any, connection_record: Any) -> None:
+    """Use WAL so reads in one worker don't block writes in another."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
 
-engine = create_async_engine(DATABASE_URL, echo=False)
 AsyncSessionLocal = async_sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
@@ -21,14 +38,24 @@ async def init_db() -> None:
     """
     Initialize the database by creating all tables.
 
-    This function should be called once at application startup.
+    This function should be called once at application startup. Every
+    server worker runs it, so a failure because another worker created the
+    tables first is ignored once the tables are confirmed to exist.
 
     Returns
     -------
     None
     """
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    except OperationalError:
+        async with engine.connect() as conn:
+            existing_tables = await conn.run_sync(
+                lambda sync_conn: set(inspect(sync_conn).get_table_names())
+            )
+        if not set(Base.metadata.tables).issubset(existing_tables):
+            raise
 
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
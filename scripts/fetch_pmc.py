@@ -1,10 +1,80 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import xml.etree.ElementTree as ET
 import csv
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+# NCBI E-utilities allow 3 requests per second without an API key
+MAX_PARALLEL_REQUESTS = 3
+# Minimum spacing between request starts to stay under that rate
+MIN_REQUEST_INTERVAL = 0.34
+
+
+class RateLimiter:
+    """Space out request starts across threads by a minimum interval."""
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def wait(self):
+        """Block until the calling thread may start its request."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.min_interval
+        time.sleep(start - now)
+
+
+def fetch_article_page(session, rate_limiter, fetch_url):
+    """Fetch one page of efetch results and parse its articles."""
+    rate_limiter.wait()
+    fetch_response = session.get(fetch_url, stream=True)
+    # A rate-limit or server error body is JSON, not article XML
+    fetch_response.raise_for_status()
+    fetch_response.raw.decode_content = True
+
+    # Stream the response and parse one article at a time to keep memory flat
+    articles = []
+    for _, article in ET.iterparse(fetch_response.raw, events=("end",)):
+        if article.tag != "article":
+            continue
+
+        pmcid = article.find(".//article-id[@pub-id-type='pmc']").text
+        title = article.find(".//article-title").text
+        abstract = article.find(".//abstract/p")
+        abstract_text = (
+            abstract.text if abstract is not None else "No abstract available"
+        )
+
+        articles.append({"PMCID": pmcid, "Title": title, "Abstract": abstract_text})
+        article.clear()
+
+    return articles
+
+
+def fetch_pmc_articles(search_terms, days=7, max_results=100, page_size=20):
+    session = requests.Session()
+    # Back off and retry when NCBI still answers 429 Too Many Requests
+    retries = Retry(
+        total=5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        backoff_factor=1,
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=MAX_PARALLEL_REQUESTS,
+        pool_maxsize=MAX_PARALLEL_REQUESTS,
+        max_retries=retries,
+    )
+    session.mount("https://", adapter)
+    rate_limiter = RateLimiter(MIN_REQUEST_INTERVAL)
 
-def fetch_pmc_articles(search_terms, days=7, max_results=100):
     base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
 
     # Get the date range for the last week
@@ -16,30 +86,28 @@ def fetch_pmc_articles(search_terms, days=7, max_results=100):
 
     # First, search for PMCIDs
     search_url = f"{base_url}esearch.fcgi?db=pmc&term={search_query}&retmax={max_results}&usehistory=y"
-    search_response = requests.get(search_url)
+    rate_limiter.wait()
+    search_response = session.get(search_url)
+    search_response.raise_for_status()
     search_root = ET.fromstring(search_response.content)
 
     # Extract WebEnv and QueryKey
     web_env = search_root.find("WebEnv").text
     query_key = search_root.find("QueryKey").text
 
-    # Now, fetch the details for these PMCIDs
-    fetch_url = f"{base_url}efetch.fcgi?db=pmc&query_key={query_key}&WebEnv={web_env}&retmax={max_results}&retmode=xml"
-    fetch_response = requests.get(fetch_url)
-    fetch_root = ET.fromstring(fetch_response.content)
+    total = min(int(search_root.find("Count").text), max_results)
 
-    articles = []
-    for article in fetch_root.findall(".//article"):
-        pmcid = article.find(".//article-id[@pub-id-type='pmc']").text
-        title = article.find(".//article-title").text
-        abstract = article.find(".//abstract/p")
-        abstract_text = (
-            abstract.text if abstract is not None else "No abstract available"
+    # Now, fetch the details for these PMCIDs, a page at a time in parallel
+    fetch_urls = [
+        f"{base_url}efetch.fcgi?db=pmc&query_key={query_key}&WebEnv={web_env}"
+        f"&retstart={start}&retmax={min(page_size, total - start)}&retmode=xml"
+        for start in range(0, total, page_size)
+    ]
+    with session, ThreadPoolExecutor(max_workers=MAX_PARALLEL_REQUESTS) as executor:
+        pages = executor.map(
+            lambda url: fetch_article_page(session, rate_limiter, url), fetch_urls
         )
-
-        articles.append({"PMCID": pmcid, "Title": title, "Abstract": abstract_text})
-
-    return articles
+        return [article for page in pages for article in page]
 
 
 def save_to_csv(articles, filename):
@@ -5,8 +5,10 @@ from datetime import datetime
 import argparse
 
 import httpx
+import orjson
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
-from pymongo import IndexModel, ASCENDING, TEXT
+from pymongo import IndexModel, ASCENDING, TEXT, UpdateOne
+from pymongo.errors import BulkWriteError
 from rich.console import Console
 from rich.logging import RichHandler
 from rich.progress import Progress, TaskID
@@ -29,6 +31,10 @@ DB_NAME = "clinical_data"
 # NER service configuration
 NER_SERVICE_URL = "http://localhost:8003/extract_entities"
 NER_SERVICE_TIMEOUT = 300  # 5 minutes
+MAX_CONCURRENT_REQUESTS = 16
+UPDATE_BATCH_SIZE = 500
+# Notes buffered ahead of the NER workers
+NOTE_QUEUE_SIZE = 2 * MAX_CONCURRENT_REQUESTS
 
 
 class Entity(BaseModel):
@@ -57,10 +63,21 @@ class NERResponse(BaseModel):
 
 class DatabaseManager:
     def __init__(self, mongo_uri: str, db_name: str):
-        self.client: AsyncIOMotorClient = AsyncIOMotorClient(mongo_uri)
+        self.client: AsyncIOMotorClient = AsyncIOMotorClient(
+            mongo_uri, maxPoolSize=50, minPoolSize=10
+        )
         self.db: AsyncIOMotorDatabase = self.client[db_name]
         self.patients_collection = self.db.patients
 
+    async def ping(self) -> None:
+        """
+        Ping the database.
+
+        Completes the connection and auth handshake before the work starts,
+        so a bad URI or credentials fail fast.
+        """
+        await self.db.command("ping")
+
     async def ensure_indexes(self) -> None:
         indexes = [
             IndexModel([("patient_id", ASCENDING)], unique=True),
@@ -87,65 +104,218 @@ class DatabaseManager:
         )
         return await cursor.to_list(length=None)
 
-    async def update_note_with_entities(
-        self, patient_id: int, note_id: str, entities: List[Entity]
+    async def bulk_update_notes_with_entities(
+        self, operations: List[UpdateOne]
     ) -> None:
-        await self.patients_collection.update_one(
-            {"patient_id": patient_id, "notes.note_id": note_id},
-            {"$set": {"notes.$.entities": [entity.dict() for entity in entities]}},
+        try:
+            result = await self.patients_collection.bulk_write(
+                operations, ordered=False
+            )
+            logger.info(f"Bulk update: {result.modified_count} notes updated")
+        except BulkWriteError as bwe:
+            logger.error(f"Bulk write error: {bwe.details}")
+            raise
+
+
+def note_entities_update(
+    patient_id: int, note_id: str, entities: List[Dict[str, Any]]
+) -> UpdateOne:
+    """
+    Build the update that stores a note's entities.
+
+    Parameters
+    ----------
+    patient_id : int
+        The patient the note belongs to.
+    note_id : str
+        The note to update.
+    entities : List[Dict[str, Any]]
+        The entities extracted from the note.
+
+    Returns
+    -------
+    UpdateOne
+        The update, to be sent in a bulk write.
+    """
+    return UpdateOne(
+        {"patient_id": patient_id, "notes.note_id": note_id},
+        {"$set": {"notes.$.entities": entities}},
+    )
+
+
+async def extract_entities(
+    client: httpx.AsyncClient, note_text: str, note_id: str, validate: bool = False
+) -> Dict[str, Any]:
+    try:
+        response = await client.post(
+            NER_SERVICE_URL,
+            content=orjson.dumps({"text": note_text}),
+            headers={"content-type": "application/json"},
         )
+        response.raise_for_status()
+        ner_response = orjson.loads(response.content)
+        ner_response["note_id"] = note_id
+        # Entities are stored as returned; the models are only checked on request
+        if validate:
+            NERResponse(**ner_response)
+        return ner_response
+    except httpx.HTTPStatusError as exc:
+        logger.error(f"HTTP error occurred: {exc}")
+        raise
+    except httpx.RequestError as exc:
+        logger.error(f"An error occurred while requesting {exc.request.url!r}.")
+        raise
+    except asyncio.TimeoutError:
+        logger.error("Request to clinical NER service timed out")
+        raise
+
 
+async def ner_worker(
+    note_queue: asyncio.Queue,
+    update_queue: asyncio.Queue,
+    client: httpx.AsyncClient,
+    validate: bool,
+    write_failed: asyncio.Event,
+    progress: Progress,
+    task: TaskID,
+) -> None:
+    """
+    Extract entities for queued notes and queue their database updates.
 
-async def extract_entities(note_text: str, note_id: str) -> NERResponse:
-    async with httpx.AsyncClient(timeout=httpx.Timeout(NER_SERVICE_TIMEOUT)) as client:
+    Parameters
+    ----------
+    note_queue : asyncio.Queue
+        Notes to process with their position, ending with a None sentinel.
+    update_queue : asyncio.Queue
+        Receives the update for each note whose entities were extracted.
+    client : httpx.AsyncClient
+        The shared client for the NER service.
+    validate : bool
+        Whether to validate NER responses against the entity schema.
+    write_failed : asyncio.Event
+        Set once a bulk write fails; remaining notes are then skipped.
+    progress : Progress
+        The progress display.
+    task : TaskID
+        The progress task for the notes.
+    """
+    while (item := await note_queue.get()) is not None:
+        i, note = item
+        if write_failed.is_set():
+            continue
         try:
-            response = await client.post(NER_SERVICE_URL, json={"text": note_text})
-            response.raise_for_status()
-            ner_response = response.json()
-            ner_response["note_id"] = note_id
-            return NERResponse(**ner_response)
-        except httpx.HTTPStatusError as exc:
-            logger.error(f"HTTP error occurred: {exc}")
-            raise
-        except httpx.RequestError as exc:
-            logger.error(f"An error occurred while requesting {exc.request.url!r}.")
-            raise
-        except asyncio.TimeoutError:
-            logger.error("Request to clinical NER service timed out")
+            ner_response = await extract_entities(
+                client, note["text"], note["note_id"], validate
+            )
+        except Exception as e:
+            logger.error(f"Error processing note {note['note_id']}: {str(e)}")
+            progress.update(task, advance=1, description=f"Error on note {i + 1}")
+            continue
+        await update_queue.put(
+            note_entities_update(
+                note["patient_id"], note["note_id"], ner_response["entities"]
+            )
+        )
+
+
+async def update_writer(
+    update_queue: asyncio.Queue,
+    db_manager: DatabaseManager,
+    write_failed: asyncio.Event,
+    progress: Progress,
+    task: TaskID,
+) -> None:
+    """
+    Write queued note updates in bulk batches.
+
+    Notes only count as processed once their entities are written. A failed
+    bulk write sets ``write_failed`` and is re-raised; the notes it carried
+    have no entities yet, so the next run retries them.
+
+    Parameters
+    ----------
+    update_queue : asyncio.Queue
+        Note updates, ending with a None sentinel.
+    db_manager : DatabaseManager
+        The database manager.
+    write_failed : asyncio.Event
+        Set when a bulk write fails.
+    progress : Progress
+        The progress display.
+    task : TaskID
+        The progress task for the notes.
+    """
+
+    async def flush(operations: List[UpdateOne]) -> None:
+        try:
+            await db_manager.bulk_update_notes_with_entities(operations)
+        except Exception:
+            write_failed.set()
             raise
+        progress.update(task, advance=len(operations))
+
+    operations: List[UpdateOne] = []
+    while (operation := await update_queue.get()) is not None:
+        operations.append(operation)
+        if len(operations) >= UPDATE_BATCH_SIZE:
+            await flush(operations)
+            operations = []
+    if operations:
+        await flush(operations)
 
 
 async def process_notes(
-    db_manager: DatabaseManager, progress: Progress, task: TaskID, recreate: bool
+    db_manager: DatabaseManager,
+    client: httpx.AsyncClient,
+    progress: Progress,
+    task: TaskID,
+    recreate: bool,
+    validate: bool,
 ) -> None:
     notes = await db_manager.get_all_notes()
     total_notes = len(notes)
     progress.update(task, total=total_notes)
 
-    for i, note in enumerate(notes):
-        if not recreate and note["entities_exist"]:
-            logger.info(f"Skipping note {note['note_id']} as entities already exist")
-            progress.update(
-                task, advance=1, description=f"Skipped note {i + 1}/{total_notes}"
-            )
-            continue
+    note_queue: asyncio.Queue = asyncio.Queue(maxsize=NOTE_QUEUE_SIZE)
+    update_queue: asyncio.Queue = asyncio.Queue()
+    # Set when a bulk write fails so the remaining notes are not sent to NER
+    write_failed = asyncio.Event()
 
-        try:
-            ner_response = await extract_entities(note["text"], note["note_id"])
-            await db_manager.update_note_with_entities(
-                note["patient_id"], note["note_id"], ner_response.entities
-            )
-            progress.update(
-                task, advance=1, description=f"Processed note {i + 1}/{total_notes}"
-            )
-        except Exception as e:
-            logger.error(f"Error processing note {note['note_id']}: {str(e)}")
-            progress.update(
-                task, advance=1, description=f"Error on note {i + 1}/{total_notes}"
+    writer = asyncio.create_task(
+        update_writer(update_queue, db_manager, write_failed, progress, task)
+    )
+    workers = [
+        asyncio.create_task(
+            ner_worker(
+                note_queue, update_queue, client, validate, write_failed, progress, task
             )
+        )
+        for _ in range(MAX_CONCURRENT_REQUESTS)
+    ]
+    try:
+        for i, note in enumerate(notes):
+            if write_failed.is_set():
+                break
+            if not recreate and note["entities_exist"]:
+                logger.info(
+                    f"Skipping note {note['note_id']} as entities already exist"
+                )
+                progress.update(
+                    task, advance=1, description=f"Skipped note {i + 1}/{total_notes}"
+                )
+                continue
+            await note_queue.put((i, note))
+    finally:
+        # Drain the pipeline: stop the NER workers first, then the writer
+        for _ in workers:
+            await note_queue.put(None)
+        await asyncio.gather(*workers)
+        await update_queue.put(None)
+        # Re-raises a failed bulk write; a rerun retries the unwritten notes
+        await writer
 
 
-async def main(recreate: bool) -> None:
+async def main(recreate: bool, validate: bool) -> None:
     start_time = datetime.now()
     console.print(
         "[bold green]Starting NER processing and database update...[/bold green]"
@@ -153,13 +323,27 @@ async def main(recreate: bool) -> None:
 
     db_manager = DatabaseManager(MONGO_URI, DB_NAME)
 
-    with Progress() as progress:
-        index_task = progress.add_task("[cyan]Ensuring database indexes...", total=1)
-        await db_manager.ensure_indexes()
-        progress.update(index_task, advance=1)
+    # Share one pooled client across all NER requests
+    client = httpx.AsyncClient(
+        timeout=httpx.Timeout(NER_SERVICE_TIMEOUT),
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    )
 
-        process_task = progress.add_task("[cyan]Processing notes...", total=None)
-        await process_notes(db_manager, progress, process_task, recreate)
+    try:
+        with Progress() as progress:
+            index_task = progress.add_task(
+                "[cyan]Ensuring database indexes...", total=1
+            )
+            await db_manager.ping()
+            await db_manager.ensure_indexes()
+            progress.update(index_task, advance=1)
+
+            process_task = progress.add_task("[cyan]Processing notes...", total=None)
+            await process_notes(
+                db_manager, client, progress, process_task, recreate, validate
+            )
+    finally:
+        await client.aclose()
 
     end_time = datetime.now()
     duration = end_time - start_time
@@ -173,6 +357,11 @@ if __name__ == "__main__":
     parser.add_argument(
         "--recreate", action="store_true", help="Recreate entities for all notes"
     )
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        help="Validate NER responses against the entity schema",
+    )
     args = parser.parse_args()
 
-    asyncio.run(main(args.recreate))
+    asyncio.run(main(args.recreate, args.validate))
@@ -2,16 +2,22 @@
 
 import asyncio
 import logging
-from typing import List, Dict, Any
+import multiprocessing
+from typing import AsyncIterator, List, Dict, Any, Set
 import argparse
+from contextlib import AsyncExitStack, asynccontextmanager
 from datetime import datetime
 from motor.motor_asyncio import (
     AsyncIOMotorClient,
     AsyncIOMotorDatabase,
     AsyncIOMotorCollection,
 )
+import struct
 import httpx
+import numpy as np
+import orjson
 import time
+from collections import defaultdict
 import pandas as pd
 from tqdm.asyncio import tqdm
 from tenacity import (
@@ -21,7 +27,7 @@ from tenacity import (
     retry_if_exception_type,
 )
 import sys
-from pymongo import ASCENDING
+from pymongo import ASCENDING, IndexModel, UpdateOne
 
 try:
     import pysqlite3  # noqa: F401
@@ -38,12 +44,39 @@ MONGO_DB_NAME = "clinical_data"
 CHROMA_HOST = "localhost"
 CHROMA_PORT = 8000
 EMBEDDING_SERVICE_URL = "http://localhost:8004/embeddings"
-BATCH_SIZE = 100
+# Notes per embedding request and Chroma insert; tune to the embedding
+# service's batch size and token budget
+BATCH_SIZE = 250
+# Cap on the total note text per batch so long notes don't stall a request
+MAX_BATCH_CHARS = 200_000
 MAX_PATIENTS = 16
+# Loader processes, each owning a patient_id % N partition and its own clients
+NUM_WORKERS = 1
+# Number of note batches being embedded concurrently
+EMBEDDING_CONCURRENCY = 8
+# Concurrent ChromaDB add() calls; the server serializes writes beyond this
+CHROMA_WRITERS = 4
+# Bound on batches buffered between pipeline stages
+PIPELINE_QUEUE_SIZE = 32
+MARK_PROCESSED_BATCH_SIZE = 50
 EMBEDDING_INSTRUCTION = (
     "Represent the clinical note for retrieval, to provide context for a search query."
 )
 VECTOR_DIM = 768
+# Patients per cursor getMore; patient documents can hold thousands of notes
+PATIENT_CURSOR_BATCH_SIZE = 4
+# Patients whose stored note ids are fetched from Chroma with one query
+EXISTING_IDS_PAGE_SIZE = 64
+# Only the note fields the loader reads; skips entities, QA pairs, etc.
+PATIENT_PROJECTION = {
+    "_id": 0,
+    "patient_id": 1,
+    "notes.note_id": 1,
+    "notes.text": 1,
+    "notes.note_type": 1,
+    "notes.timestamp": 1,
+    "notes.encounter_id": 1,
+}
 
 # Configure logging
 logging.basicConfig(
@@ -52,43 +85,50 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def parse_timestamp(timestamp_str: str) -> int:
-    """Convert timestamp string to Unix timestamp."""
-    try:
-        dt = pd.to_datetime(timestamp_str)
-        return int(dt.timestamp())
-    except Exception as e:
-        logger.error(f"Error parsing timestamp {timestamp_str}: {e}")
-        return int(datetime.now().timestamp())
+def parse_timestamps(timestamp_strs: List[str]) -> List[int]:
+    """Convert timestamp strings to Unix timestamps in a single pass.
+
+    Notes from one encounter share timestamps, so each distinct string is
+    parsed once and the results are broadcast back by position.
+    """
+    codes, unique_strs = pd.factorize(pd.Series(timestamp_strs))
+    parsed_unique = pd.to_datetime(
+        pd.Series(unique_strs), errors="coerce", utc=True, format="ISO8601"
+    )
+    # Missing values get code -1, which take() fills with NaT
+    parsed = pd.Series(parsed_unique.array.take(codes, allow_fill=True))
+    invalid = int(parsed.isna().sum())
+    if invalid:
+        logger.error(f"Error parsing {invalid} timestamps, using current time")
+    seconds = (parsed - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)
+    return seconds.fillna(int(datetime.now().timestamp())).astype("int64").tolist()
 
 
 class DatabaseManager:
     def __init__(self, mongo_uri: str, db_name: str):
         self.client: AsyncIOMotorClient[Any] = AsyncIOMotorClient(
-            mongo_uri, serverSelectionTimeoutMS=5000
+            mongo_uri, serverSelectionTimeoutMS=5000, maxPoolSize=50, minPoolSize=10
         )
         self.db: AsyncIOMotorDatabase[Any] = self.client[db_name]
         self.patients_collection: AsyncIOMotorCollection[Any] = self.db.patients
 
+    async def ping(self) -> None:
+        """Complete the connection and auth handshake before the work starts."""
+        await self.db.command("ping")
+
     async def ensure_indexes(self) -> None:
         """Create MongoDB indexes if they don't exist."""
         try:
-            existing_indexes = await self.patients_collection.index_information()
-
-            indexes = [("patient_id", ASCENDING), ("notes.note_id", ASCENDING)]
-
-            for field, direction in indexes:
-                index_name = f"{field}_{direction}"
-                if index_name not in existing_indexes:
-                    await self.patients_collection.create_index(
-                        [(field, direction)],
-                        unique=(field == "patient_id"),
-                        background=True,
-                    )
-                    logger.info(f"Created index: {index_name}")
-                else:
-                    logger.info(f"Index '{index_name}' already exists")
-
+            # One round trip; MongoDB skips indexes that already exist.
+            # "processed" stays dense so the unprocessed-patient query can use it.
+            await self.patients_collection.create_indexes(
+                [
+                    IndexModel([("patient_id", ASCENDING)], unique=True),
+                    IndexModel([("notes.note_id", ASCENDING)]),
+                    IndexModel([("processed", ASCENDING)]),
+                ]
+            )
+            logger.info("Ensured MongoDB indexes")
         except Exception as e:
             logger.error(f"Error ensuring indexes: {e}")
             raise
@@ -98,12 +138,32 @@ class DatabaseManager:
     ) -> List[Dict]:
         """Fetch a batch of patients from MongoDB."""
         try:
-            cursor = self.patients_collection.find(query).skip(skip).limit(limit)
+            cursor = (
+                self.patients_collection.find(query, projection=PATIENT_PROJECTION)
+                .skip(skip)
+                .limit(limit)
+            )
             return await cursor.to_list(length=limit)
         except Exception as e:
             logger.error(f"Error fetching patients batch: {e}")
             raise
 
+    async def mark_processed(self, patient_ids: List[int]) -> None:
+        """Flag patients as processed with a single bulk write."""
+        if not patient_ids:
+            return
+        try:
+            await self.patients_collection.bulk_write(
+                [
+                    UpdateOne({"patient_id": pid}, {"$set": {"processed": True}})
+                    for pid in patient_ids
+                ],
+                ordered=False,
+            )
+        except Exception as e:
+            logger.error(f"Error marking patients as processed: {e}")
+            raise
+
     async def close(self):
         """Close the MongoDB connection."""
         self.client.close()
@@ -123,15 +183,25 @@ class EmbeddingManager:
         wait=wait_exponential(multiplier=1, max=10),
         retry=retry_if_exception_type((httpx.HTTPStatusError, httpx.RequestError)),
     )
-    async def get_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Get embeddings for a list of texts."""
+    async def get_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Get embeddings for a list of texts as a float32 array."""
         try:
             response = await self.client.post(
                 self.embedding_service_url,
-                json={"texts": texts, "instruction": EMBEDDING_INSTRUCTION},
+                content=orjson.dumps(
+                    {"texts": texts, "instruction": EMBEDDING_INSTRUCTION}
+                ),
+                # Raw float32 bytes behind a (count, dim) header instead of JSON
+                headers={
+                    "content-type": "application/json",
+                    "accept": "application/octet-stream",
+                },
             )
             response.raise_for_status()
-            return response.json()["embeddings"]
+            num_embeddings, dim = struct.unpack_from("<II", response.content)
+            return np.frombuffer(response.content, dtype="<f4", offset=8).reshape(
+                num_embeddings, dim
+            )
         except Exception as e:
             logger.error(f"Error getting embeddings: {e}")
             raise
@@ -149,16 +219,16 @@ class ChromaManager:
         self.client = None
         self.collection = None
 
-    def connect(self):
+    async def connect(self):
         """Connect to ChromaDB instance."""
-        self.client = chromadb.HttpClient(
+        self.client = await chromadb.AsyncHttpClient(
             host=self.host,
             port=self.port,
             settings=Settings(allow_reset=True, anonymized_telemetry=False),
         )
         logger.info(f"Connected to ChromaDB at {self.host}:{self.port}")
 
-    def reset_collection(self):
+    async def reset_collection(self):
         """Reset the collection in ChromaDB."""
         try:
             if self.client is None:
@@ -168,7 +238,7 @@ class ChromaManager:
 
             # Delete the collection if it exists
             try:
-                self.client.delete_collection(name=self.collection_name)
+                await self.client.delete_collection(name=self.collection_name)
                 logger.info(f"Deleted collection: {self.collection_name}")
             except Exception as e:
                 logger.debug(f"Collection deletion skipped: {e}")
@@ -180,19 +250,23 @@ class ChromaManager:
             logger.error(f"Error resetting collection: {e}")
             raise
 
-    def get_or_create_collection(self):
-        """Get or create a ChromaDB collection with cosine distance metric."""
+    async def get_or_create_collection(self):
+        """Get or create a ChromaDB collection with inner product distance metric.
+
+        Embeddings are L2-normalized before insertion, so inner product ranks
+        notes the same as cosine without normalizing each vector server-side.
+        """
         try:
             if self.client is None:
                 raise RuntimeError(
                     "ChromaDB client not initialized. Call connect() first."
                 )
 
-            self.collection = self.client.get_or_create_collection(
+            self.collection = await self.client.get_or_create_collection(
                 name=self.collection_name,
                 metadata={
                     "description": "Patient notes collection",
-                    "hnsw:space": "cosine",
+                    "hnsw:space": "ip",
                 },
             )
             logger.info(f"Got/created collection: {self.collection_name}")
@@ -201,11 +275,26 @@ class ChromaManager:
             logger.error(f"Error creating/getting collection: {e}")
             raise
 
-    def insert_vectors(
+    async def get_note_ids(self, patient_ids: List[int]) -> Dict[str, Set[str]]:
+        """Get the ids of the notes already stored for a page of patients."""
+        if self.collection is None:
+            raise RuntimeError(
+                "Collection not initialized. Call get_or_create_collection() first."
+            )
+        existing = await self.collection.get(
+            where={"patient_id": {"$in": [str(pid) for pid in patient_ids]}},
+            include=["metadatas"],
+        )
+        note_ids: Dict[str, Set[str]] = defaultdict(set)
+        for note_id, metadata in zip(existing["ids"], existing["metadatas"]):
+            note_ids[metadata["patient_id"]].add(note_id)
+        return note_ids
+
+    async def insert_vectors(
         self,
-        patient_ids: List[int],
+        patient_id: int,
         note_ids: List[str],
-        embeddings: List[List[float]],
+        embeddings: np.ndarray,
         note_texts: List[str],
         note_types: List[str],
         timestamps: List[int],
@@ -218,21 +307,26 @@ class ChromaManager:
                     "Collection not initialized. Call get_or_create_collection() first."
                 )
 
-            metadatas = [
-                {
-                    "patient_id": str(pid),
-                    "note_type": nt,
-                    "timestamp": ts,
-                    "encounter_id": str(eid),
-                    "note_text": txt,
-                }
-                for pid, nt, ts, eid, txt in zip(
-                    patient_ids, note_types, timestamps, encounter_ids, note_texts
+            # Build ids and metadata in one pass; the patient is fixed per batch.
+            # The note text is stored once, as the document, not in metadata.
+            patient_id_str = str(patient_id)
+            ids = []
+            metadatas = []
+            for nid, nt, ts, eid in zip(
+                note_ids, note_types, timestamps, encounter_ids
+            ):
+                ids.append(str(nid))  # Ensure note_ids are strings
+                metadatas.append(
+                    {
+                        "patient_id": patient_id_str,
+                        "note_type": nt,
+                        "timestamp": ts,
+                        "encounter_id": str(eid),
+                    }
                 )
-            ]
 
-            self.collection.add(
-                ids=[str(nid) for nid in note_ids],  # Ensure note_ids are strings
+            await self.collection.add(
+                ids=ids,
                 embeddings=embeddings,
                 metadatas=metadatas,
                 documents=note_texts,
@@ -243,36 +337,181 @@ class ChromaManager:
             raise
 
 
-async def process_batch(
+def split_notes(notes: List[Dict], batch_size: int) -> List[List[Dict]]:
+    """Split notes into batches capped by count and by total text length."""
+    batches: List[List[Dict]] = []
+    batch: List[Dict] = []
+    batch_chars = 0
+    for note in notes:
+        note_chars = len(note["text"])
+        if batch and (
+            len(batch) >= batch_size or batch_chars + note_chars > MAX_BATCH_CHARS
+        ):
+            batches.append(batch)
+            batch, batch_chars = [], 0
+        batch.append(note)
+        batch_chars += note_chars
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+async def insert_batch(
     patient_id: int,
     batch_notes: List[Dict],
+    embeddings: np.ndarray,
     chroma_manager: ChromaManager,
+) -> None:
+    """Insert an embedded batch of notes for a patient into ChromaDB."""
+    texts = [note["text"] for note in batch_notes]
+    note_ids = [note["note_id"] for note in batch_notes]
+    note_types = [note["note_type"] for note in batch_notes]
+    timestamps = parse_timestamps([note["timestamp"] for note in batch_notes])
+    encounter_ids = [note["encounter_id"] for note in batch_notes]
+
+    await chroma_manager.insert_vectors(
+        patient_id,
+        note_ids,
+        embeddings,
+        texts,
+        note_types,
+        timestamps,
+        encounter_ids,
+    )
+
+
+class PatientTracker:
+    """Track outstanding note batches per patient as they leave the pipeline."""
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db_manager = db_manager
+        self.remaining_batches: Dict[int, int] = {}
+        self.failed_patients: Set[int] = set()
+        self.completed_ids: List[int] = []
+        self.patients_processed = 0
+        self.notes_processed = 0
+
+    def add_patient(self, patient_id: int, num_batches: int) -> None:
+        """Register a patient whose batches are about to be queued."""
+        self.remaining_batches[patient_id] = num_batches
+
+    def skip_patient(self, patient_id: int) -> None:
+        """Record a patient whose notes are all in ChromaDB already."""
+        self.patients_processed += 1
+        self.completed_ids.append(patient_id)
+
+    def batch_done(self, patient_id: int, num_notes: int, succeeded: bool) -> None:
+        """Record a finished batch; a patient completes with its last batch."""
+        self.notes_processed += num_notes
+        if not succeeded:
+            self.failed_patients.add(patient_id)
+        self.remaining_batches[patient_id] -= 1
+        if self.remaining_batches[patient_id] > 0:
+            return
+
+        del self.remaining_batches[patient_id]
+        self.patients_processed += 1
+        # Patients with a failed batch are left unflagged and retried next run
+        if patient_id in self.failed_patients:
+            self.failed_patients.discard(patient_id)
+        else:
+            self.completed_ids.append(patient_id)
+
+    async def flush(self) -> None:
+        """Mark completed patients as processed in MongoDB."""
+        completed_ids, self.completed_ids = self.completed_ids, []
+        await self.db_manager.mark_processed(completed_ids)
+
+
+def normalize_embeddings(embeddings: np.ndarray) -> np.ndarray:
+    """L2-normalize each embedding so inner product equals cosine similarity."""
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+async def embed_worker(
+    batch_queue: asyncio.Queue,
+    insert_queue: asyncio.Queue,
     embedding_manager: EmbeddingManager,
-) -> int:
-    """Process a batch of notes for a patient."""
-    try:
+    tracker: PatientTracker,
+) -> None:
+    """Embed note batches and hand them to the ChromaDB writer."""
+    while (item := await batch_queue.get()) is not None:
+        patient_id, batch_notes = item
         texts = [note["text"] for note in batch_notes]
-        embeddings = await embedding_manager.get_embeddings(texts)
-
-        note_ids = [str(note["note_id"]) for note in batch_notes]
-        note_types = [note["note_type"] for note in batch_notes]
-        timestamps = [parse_timestamp(note["timestamp"]) for note in batch_notes]
-        encounter_ids = [note["encounter_id"] for note in batch_notes]
-        patient_ids = [patient_id] * len(texts)
-
-        chroma_manager.insert_vectors(
-            patient_ids,
-            note_ids,
-            embeddings,
-            texts,
-            note_types,
-            timestamps,
-            encounter_ids,
-        )
-        return len(texts)
-    except Exception as e:
-        logger.error(f"Error processing batch for patient {patient_id}: {e}")
-        return 0
+        # Embed each distinct text once; repeated boilerplate notes share a vector
+        unique_texts = list(dict.fromkeys(texts))
+        try:
+            unique_embeddings = await embedding_manager.get_embeddings(unique_texts)
+        except Exception as e:
+            logger.error(f"Error embedding batch for patient {patient_id}: {e}")
+            tracker.batch_done(patient_id, 0, succeeded=False)
+            continue
+        unique_embeddings = normalize_embeddings(unique_embeddings)
+        index_by_text = {text: i for i, text in enumerate(unique_texts)}
+        embeddings = unique_embeddings[[index_by_text[text] for text in texts]]
+        await insert_queue.put((patient_id, batch_notes, embeddings))
+
+
+async def chroma_writer(
+    insert_queue: asyncio.Queue,
+    chroma_manager: ChromaManager,
+    tracker: PatientTracker,
+) -> None:
+    """Insert embedded batches into ChromaDB as they arrive."""
+    while (item := await insert_queue.get()) is not None:
+        patient_id, batch_notes, embeddings = item
+        try:
+            await insert_batch(patient_id, batch_notes, embeddings, chroma_manager)
+        except Exception as e:
+            logger.error(f"Error inserting batch for patient {patient_id}: {e}")
+            tracker.batch_done(patient_id, 0, succeeded=False)
+            continue
+        tracker.batch_done(patient_id, len(batch_notes), succeeded=True)
+
+
+async def enqueue_patients(
+    page: List[Dict],
+    chroma_manager: ChromaManager,
+    tracker: PatientTracker,
+    batch_queue: asyncio.Queue,
+    batch_size: int,
+    skip_stored: bool,
+) -> None:
+    """Queue note batches for a page of patients.
+
+    With ``skip_stored``, notes already in ChromaDB are looked up for the
+    whole page in one query and left out.
+    """
+    existing_ids: Dict[str, Set[str]] = {}
+    if skip_stored:
+        # Resume partially loaded patients by embedding only missing notes
+        try:
+            existing_ids = await chroma_manager.get_note_ids(
+                [patient["patient_id"] for patient in page]
+            )
+        except Exception as e:
+            # Left unprocessed, so the next run picks these patients up
+            logger.error(f"Skipping {len(page)} patients, Chroma lookup failed: {e}")
+            return
+
+    for patient in page:
+        patient_id = patient["patient_id"]
+        notes = patient["notes"]
+        stored_ids = existing_ids.get(str(patient_id))
+        if stored_ids:
+            notes = [note for note in notes if str(note["note_id"]) not in stored_ids]
+            if not notes:
+                tracker.skip_patient(patient_id)
+                continue
+
+        batches = split_notes(notes, batch_size)
+        tracker.add_patient(patient_id, len(batches))
+        for batch_notes in batches:
+            await batch_queue.put((patient_id, batch_notes))
+
+    if len(tracker.completed_ids) >= MARK_PROCESSED_BATCH_SIZE:
+        await tracker.flush()
 
 
 async def process_patients(
@@ -280,67 +519,203 @@ async def process_patients(
     chroma_manager: ChromaManager,
     embedding_manager: EmbeddingManager,
     recreate_collection: bool,
+    concurrency: int,
+    batch_size: int,
+    shard_id: int = 0,
+    num_shards: int = 1,
 ):
-    """Process all patients and their notes."""
+    """Process all patients and their notes.
+
+    Patients are read from MongoDB and split into note batches, which
+    ``concurrency`` workers embed in parallel while a few writers insert
+    the results into ChromaDB. With ``num_shards > 1`` only patients whose
+    ``patient_id % num_shards == shard_id`` are processed.
+    """
     query = {} if recreate_collection else {"processed": {"$ne": True}}
-    total_patients = await db_manager.patients_collection.count_documents(query)
-    total_patients = min(MAX_PATIENTS, total_patients)
+    if num_shards > 1:
+        query["patient_id"] = {"$mod": [num_shards, shard_id]}
+    # Each shard takes its share of the patient cap
+    max_patients = max(1, MAX_PATIENTS // num_shards)
+    # Count only up to the cap; the query matches this shard's pending patients
+    total_patients = await db_manager.patients_collection.count_documents(
+        query, limit=max_patients
+    )
 
-    patients_processed = 0
-    total_notes_processed = 0
-    start_time = time.time()
+    cursor = db_manager.patients_collection.find(
+        query, projection=PATIENT_PROJECTION
+    ).batch_size(PATIENT_CURSOR_BATCH_SIZE)
 
-    async for patient in tqdm(
-        db_manager.patients_collection.find(query).limit(MAX_PATIENTS),
-        total=total_patients,
-        desc="Processing patients",
-    ):
-        patient_id = patient["patient_id"]
-        notes = patient.get("notes", [])
+    start_time = time.time()
+    batch_queue: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    insert_queue: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    tracker = PatientTracker(db_manager)
 
-        if not notes:
-            continue
+    workers = [
+        asyncio.create_task(
+            embed_worker(batch_queue, insert_queue, embedding_manager, tracker)
+        )
+        for _ in range(concurrency)
+    ]
+    writers = [
+        asyncio.create_task(chroma_writer(insert_queue, chroma_manager, tracker))
+        for _ in range(CHROMA_WRITERS)
+    ]
 
-        for i in range(0, len(notes), BATCH_SIZE):
-            batch_notes = notes[i : i + BATCH_SIZE]
-            notes_processed = await process_batch(
-                patient_id, batch_notes, chroma_manager, embedding_manager
+    try:
+        page: List[Dict] = []
+        async for patient in tqdm(
+            cursor.limit(max_patients),
+            total=total_patients,
+            desc=f"Processing patients (shard {shard_id})",
+            position=shard_id,
+        ):
+            if not patient.get("notes"):
+                continue
+            page.append(patient)
+            if len(page) >= EXISTING_IDS_PAGE_SIZE:
+                await enqueue_patients(
+                    page,
+                    chroma_manager,
+                    tracker,
+                    batch_queue,
+                    batch_size,
+                    not recreate_collection,
+                )
+                page = []
+        if page:
+            await enqueue_patients(
+                page,
+                chroma_manager,
+                tracker,
+                batch_queue,
+                batch_size,
+                not recreate_collection,
             )
-            total_notes_processed += notes_processed
+    finally:
+        # Drain the pipeline: stop the workers first, then the writers
+        for _ in workers:
+            await batch_queue.put(None)
+        await asyncio.gather(*workers)
+        for _ in writers:
+            await insert_queue.put(None)
+        await asyncio.gather(*writers)
 
-        await db_manager.patients_collection.update_one(
-            {"patient_id": patient_id}, {"$set": {"processed": True}}
-        )
-        patients_processed += 1
+    await tracker.flush()
 
     end_time = time.time()
     logger.info(
-        f"Processed {patients_processed} patients and {total_notes_processed} "
-        f"notes in {end_time - start_time:.2f} seconds"
+        f"Processed {tracker.patients_processed} patients and "
+        f"{tracker.notes_processed} notes in {end_time - start_time:.2f} seconds"
     )
 
 
-async def main(recreate_collection: bool):
+@asynccontextmanager
+async def chroma_lifespan(
+    host: str, port: int, recreate_collection: bool
+) -> AsyncIterator[ChromaManager]:
+    """Connect the async Chroma client once and prepare the collection."""
+    chroma_manager = ChromaManager(host, port)
+    await chroma_manager.connect()
+    if recreate_collection:
+        await chroma_manager.reset_collection()
+    await chroma_manager.get_or_create_collection()
+    yield chroma_manager
+
+
+async def main(
+    recreate_collection: bool,
+    concurrency: int,
+    batch_size: int,
+    shard_id: int = 0,
+    num_shards: int = 1,
+):
     """Main execution function."""
-    db_manager = DatabaseManager(MONGO_URI, MONGO_DB_NAME)
-    chroma_manager = ChromaManager(CHROMA_HOST, CHROMA_PORT)
-    embedding_manager = EmbeddingManager(EMBEDDING_SERVICE_URL)
+    async with AsyncExitStack() as stack:
+        # Clients are created once and closed together when the run ends
+        db_manager = DatabaseManager(MONGO_URI, MONGO_DB_NAME)
+        stack.push_async_callback(db_manager.close)
+        embedding_manager = EmbeddingManager(EMBEDDING_SERVICE_URL)
+        stack.push_async_callback(embedding_manager.close)
+
+        try:
+            # Sharded runs reset the collection once, before the workers start
+            chroma_manager = await stack.enter_async_context(
+                chroma_lifespan(
+                    CHROMA_HOST, CHROMA_PORT, recreate_collection and num_shards == 1
+                )
+            )
+            await db_manager.ping()
+            await db_manager.ensure_indexes()
+            await process_patients(
+                db_manager,
+                chroma_manager,
+                embedding_manager,
+                recreate_collection,
+                concurrency,
+                batch_size,
+                shard_id,
+                num_shards,
+            )
+        except Exception as e:
+            logger.error(f"An error occurred during processing: {e}")
+            raise
+
 
+def install_uvloop() -> None:
+    """Use uvloop for the Mongo/HTTP/Chroma I/O when it is installed."""
     try:
-        chroma_manager.connect()
-        if recreate_collection:
-            chroma_manager.reset_collection()
-        chroma_manager.get_or_create_collection()
-        await db_manager.ensure_indexes()
-        await process_patients(
-            db_manager, chroma_manager, embedding_manager, recreate_collection
+        import uvloop
+
+        uvloop.install()
+    except ImportError:
+        pass
+
+
+async def prepare_collection(recreate_collection: bool) -> None:
+    """Reset and create the collection once before the shard workers start."""
+    async with chroma_lifespan(CHROMA_HOST, CHROMA_PORT, recreate_collection):
+        pass
+
+
+def run_shard(
+    recreate_collection: bool,
+    concurrency: int,
+    batch_size: int,
+    shard_id: int,
+    num_shards: int,
+) -> None:
+    """Entry point of a loader process; runs one shard on its own event loop."""
+    install_uvloop()
+    asyncio.run(
+        main(recreate_collection, concurrency, batch_size, shard_id, num_shards)
+    )
+
+
+def run_shards(
+    recreate_collection: bool, concurrency: int, batch_size: int, num_workers: int
+) -> None:
+    """Load the patients in ``num_workers`` processes partitioned by patient_id."""
+    asyncio.run(prepare_collection(recreate_collection))
+
+    # Spawn so no event loop or client state is inherited from this process
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(
+            target=run_shard,
+            args=(recreate_collection, concurrency, batch_size, shard_id, num_workers),
+            name=f"shard-{shard_id}",
         )
-    except Exception as e:
-        logger.error(f"An error occurred during processing: {e}")
-        raise
-    finally:
-        await embedding_manager.close()
-        await db_manager.close()
+        for shard_id in range(num_workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    failed = [process.name for process in processes if process.exitcode != 0]
+    if failed:
+        logger.error(f"Loader processes failed: {', '.join(failed)}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -352,6 +727,28 @@ if __name__ == "__main__":
         action="store_true",
         help="Recreate the entire collection in ChromaDB",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=EMBEDDING_CONCURRENCY,
+        help="Number of note batches to embed concurrently",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=BATCH_SIZE,
+        help="Maximum number of notes per embedding request and insert",
+    )
+    parser.add_argument(
+        "--num-workers",
+        type=int,
+        default=NUM_WORKERS,
+        help="Number of loader processes, each handling a patient_id partition",
+    )
     args = parser.parse_args()
 
-    asyncio.run(main(args.recreate))
+    if args.num_workers > 1:
+        run_shards(args.recreate, args.concurrency, args.batch_size, args.num_workers)
+    else:
+        install_uvloop()
+        asyncio.run(main(args.recreate, args.concurrency, args.batch_size))
@@ -1,7 +1,10 @@
 import asyncio
+import contextlib
 import logging
-from typing import List, Dict
+from typing import List, Dict, Set, Tuple
 import argparse
+import base64
+import numpy as np
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymilvus import (
     connections,
@@ -12,6 +15,7 @@ from pymilvus import (
     utility,
 )
 import httpx
+import orjson
 import time
 from tqdm.asyncio import tqdm
 from tenacity import (
@@ -28,7 +32,10 @@ MILVUS_HOST = "localhost"
 MILVUS_PORT = 19530
 EMBEDDING_SERVICE_URL = "http://localhost:8004/embeddings"
 BATCH_SIZE = 100
+INSERT_BUFFER_SIZE = 10000
 MAX_CONCEPTS = 10000000  # Adjust as needed
+# Refresh the Mongo session well within the 30 minute idle session timeout
+SESSION_REFRESH_INTERVAL = 300
 EMBEDDING_INSTRUCTION = (
     "Represent the UMLS concept for retrieval, to provide context for a search query."
 )
@@ -59,7 +66,11 @@ class EmbeddingManager:
             logger.info(f"Sending request to embedding service with {len(texts)} texts")
             response = await self.client.post(
                 self.embedding_service_url,
-                json={"texts": texts, "instruction": EMBEDDING_INSTRUCTION},
+                content=orjson.dumps(
+                    {"texts": texts, "instruction": EMBEDDING_INSTRUCTION}
+                ),
+                headers={"content-type": "application/json"},
+                params={"encoding": "fp16b64"},
             )
             logger.info(
                 f"Received response from embedding service. Status code: {response.status_code}"
@@ -67,18 +78,20 @@ class EmbeddingManager:
 
             response.raise_for_status()
 
-            response_json = response.json()
+            response_json = orjson.loads(response.content)
             logger.info("Successfully parsed response JSON")
 
-            embeddings = response_json["embeddings"]
+            # Embeddings arrive as base64 float16 bytes; Milvus expects float32
+            embeddings = (
+                np.frombuffer(
+                    base64.b64decode(response_json["embeddings"]), dtype=np.float16
+                )
+                .astype(np.float32)
+                .reshape(-1, response_json["dim"])
+            )
             logger.info(f"Retrieved {len(embeddings)} embeddings from response")
 
-            processed_embeddings = [
-                [float(value) for value in embedding.split(",")]
-                if isinstance(embedding, str)
-                else embedding
-                for embedding in embeddings
-            ]
+            processed_embeddings = embeddings.tolist()
             logger.info(f"Processed {len(processed_embeddings)} embeddings")
 
             return processed_embeddings
@@ -96,6 +109,11 @@ class MilvusManager:
         self.port = port
         self.collection_name = "umls_concepts"
         self.collection = None
+        # A collection created by this run starts empty and unindexed
+        self.is_new_collection = False
+        self._pending_cuis: List[str] = []
+        self._pending_terms: List[str] = []
+        self._pending_embeddings: List[List[float]] = []
 
     def connect(self):
         connections.connect(host=self.host, port=self.port)
@@ -110,29 +128,69 @@ class MilvusManager:
         ]
         schema = CollectionSchema(fields, "UMLS concepts collection")
         collection = Collection(self.collection_name, schema)
+        self.is_new_collection = True
+        logger.info(f"Created Milvus collection: {self.collection_name}")
+        return collection
+
+    def build_index(self):
+        """Build the vector index once the bulk load is complete."""
+        if self.collection.has_index():
+            return
         index_params = {
             "metric_type": "COSINE",
             "index_type": "IVF_FLAT",
             "params": {"nlist": 1024},
         }
-        collection.create_index(field_name="embedding", index_params=index_params)
-        logger.info(f"Created Milvus collection: {self.collection_name}")
-        return collection
+        self.collection.create_index(field_name="embedding", index_params=index_params)
+        self.collection.load()
+        logger.info(f"Built index for Milvus collection: {self.collection_name}")
 
     def get_or_create_collection(self, dim: int) -> Collection:
         if not utility.has_collection(self.collection_name):
             self.collection = self.create_collection(dim)
         else:
             self.collection = Collection(self.collection_name)
-            self.collection.load()
+            if self.collection.has_index():
+                self.collection.load()
+            else:
+                # An interrupted run can leave the collection unindexed, and
+                # Milvus refuses to load a collection without an index
+                self.build_index()
         return self.collection
 
+    def setup(self, dim: int, recreate_collection: bool) -> Collection:
+        """Connect and prepare the collection, dropping it first if requested."""
+        self.connect()
+        if recreate_collection:
+            utility.drop_collection(self.collection_name)
+            logger.info(f"Dropped existing collection: {self.collection_name}")
+        return self.get_or_create_collection(dim)
+
     def insert_vectors(
         self,
         cuis: List[str],
         preferred_terms: List[str],
         embeddings: List[List[float]],
-    ):
+    ) -> List[str]:
+        """Buffer vectors and insert them into Milvus in large batches.
+
+        Returns the CUIs written to Milvus by this call, which is empty while
+        the vectors are only buffered.
+        """
+        self._pending_cuis.extend(cuis)
+        self._pending_terms.extend(preferred_terms)
+        self._pending_embeddings.extend(embeddings)
+        if len(self._pending_cuis) >= INSERT_BUFFER_SIZE:
+            return self.insert_pending()
+        return []
+
+    def insert_pending(self) -> List[str]:
+        """Insert the buffered vectors and return the CUIs that were written.
+
+        The buffer is kept if the insert fails so the vectors are not lost.
+        """
+        if not self._pending_cuis:
+            return []
         try:
             entities = [
                 {
@@ -140,41 +198,78 @@ class MilvusManager:
                     "preferred_term": term,
                     "embedding": emb,
                 }
-                for cui, term, emb in zip(cuis, preferred_terms, embeddings)
+                for cui, term, emb in zip(
+                    self._pending_cuis, self._pending_terms, self._pending_embeddings
+                )
             ]
             self.collection.insert(entities)
-            self.collection.flush()
             logger.info(f"Successfully inserted {len(entities)} entities into Milvus")
         except Exception as e:
             logger.error(f"Error inserting vectors into Milvus: {e}")
             raise
 
-    def concept_exists(self, cui: str) -> bool:
-        return (
-            len(self.collection.query(expr=f'cui == "{cui}"', output_fields=["cui"]))
-            > 0
+        inserted_cuis = self._pending_cuis
+        self._pending_cuis = []
+        self._pending_terms = []
+        self._pending_embeddings = []
+        return inserted_cuis
+
+    def finalize(self):
+        """Insert any buffered vectors, flush once and build the index."""
+        if self.collection is None:
+            return
+        self.insert_pending()
+        self.collection.flush()
+        logger.info(f"Flushed Milvus collection: {self.collection_name}")
+        self.build_index()
+
+    def existing_concepts(self, cuis: List[str]) -> Set[str]:
+        """Return the subset of CUIs already stored, using a single query."""
+        cui_list = ", ".join(f'"{cui}"' for cui in cuis)
+        results = self.collection.query(
+            expr=f"cui in [{cui_list}]", output_fields=["cui"]
         )
+        return {result["cui"] for result in results}
 
 
 async def process_batch(
     batch_concepts: List[Dict],
     milvus_manager: MilvusManager,
     embedding_manager: EmbeddingManager,
-) -> int:
+) -> Tuple[int, List[str]]:
+    """Embed and store the batch's new concepts.
+
+    Returns the number of concepts embedded and the CUIs that are now stored
+    in Milvus, either already present or written by a buffer flush. Only
+    those may be marked processed; buffered vectors are not durable yet.
+    """
     try:
         cuis = []
         preferred_terms = []
         texts = []
+        stored_cuis = []
+
+        # Nothing can exist yet in a collection created by this run
+        existing_cuis = (
+            set()
+            if milvus_manager.is_new_collection
+            else await asyncio.to_thread(
+                milvus_manager.existing_concepts,
+                [concept["cui"] for concept in batch_concepts],
+            )
+        )
 
         for concept in batch_concepts:
-            if not milvus_manager.concept_exists(concept["cui"]):
+            if concept["cui"] in existing_cuis:
+                stored_cuis.append(concept["cui"])
+            else:
                 cuis.append(concept["cui"])
                 preferred_terms.append(concept["preferred_term"])
                 texts.append(concept["combined_text"])
 
         if not cuis:
             logger.info("All concepts in this batch already exist in Milvus. Skipping.")
-            return 0
+            return 0, stored_cuis
 
         embeddings = await embedding_manager.get_embeddings(texts)
 
@@ -191,11 +286,37 @@ async def process_batch(
             f"Sample data - CUI: {cuis[0]}, Preferred Term: {preferred_terms[0]}"
         )
 
-        milvus_manager.insert_vectors(cuis, preferred_terms, embeddings)
-        return len(cuis)
+        stored_cuis += await asyncio.to_thread(
+            milvus_manager.insert_vectors, cuis, preferred_terms, embeddings
+        )
+        return len(cuis), stored_cuis
     except Exception as e:
         logger.error(f"Error processing batch: {e}")
-        return 0
+        return 0, []
+
+
+async def keep_session_alive(mongo_client: AsyncIOMotorClient, session) -> None:
+    """Periodically refresh a session so its no-timeout cursor isn't reaped."""
+    while True:
+        await asyncio.sleep(SESSION_REFRESH_INTERVAL)
+        try:
+            await mongo_client.admin.command({"refreshSessions": [session.session_id]})
+        except Exception as e:
+            logger.warning(f"Failed to refresh Mongo session: {e}")
+
+
+async def mark_processed(umls_collection, cuis: List[str]) -> None:
+    """Flag concepts whose vectors are stored in Milvus as processed.
+
+    Runs outside the cursor's session: the prefetched getMore may be using it
+    on another thread, and a ClientSession is not thread-safe.
+    """
+    if not cuis:
+        return
+    await umls_collection.update_many(
+        {"cui": {"$in": cuis}},
+        {"$set": {"processed": True}},
+    )
 
 
 async def process_concepts(
@@ -215,28 +336,32 @@ async def process_concepts(
         total = await umls_collection.count_documents(query, session=session)
         total = min(MAX_CONCEPTS, total)
 
-        async for batch in tqdm(
-            AsyncBatchIterator(
-                umls_collection.find(query, no_cursor_timeout=True, session=session),
-                BATCH_SIZE,
-            ),
-            total=(total + BATCH_SIZE - 1) // BATCH_SIZE,
-            desc="Processing concepts",
-        ):
-            processed_count = await process_batch(
-                batch, milvus_manager, embedding_manager
-            )
-            concepts_processed += processed_count
-
-            cuis = [concept["cui"] for concept in batch]
-            await umls_collection.update_many(
-                {"cui": {"$in": cuis}},
-                {"$set": {"processed": True}},
-                session=session,
-            )
-
-            if concepts_processed >= MAX_CONCEPTS:
-                break
+        batches = AsyncBatchIterator(
+            umls_collection.find(query, no_cursor_timeout=True, session=session),
+            BATCH_SIZE,
+        )
+        keep_alive = asyncio.create_task(keep_session_alive(mongo_client, session))
+        try:
+            async for batch in tqdm(
+                batches,
+                total=(total + BATCH_SIZE - 1) // BATCH_SIZE,
+                desc="Processing concepts",
+            ):
+                processed_count, stored_cuis = await process_batch(
+                    batch, milvus_manager, embedding_manager
+                )
+                concepts_processed += processed_count
+                await mark_processed(umls_collection, stored_cuis)
+
+                if concepts_processed >= MAX_CONCEPTS:
+                    break
+
+            # Write the remaining buffer so its concepts can be flagged too
+            stored_cuis = await asyncio.to_thread(milvus_manager.insert_pending)
+            await mark_processed(umls_collection, stored_cuis)
+        finally:
+            keep_alive.cancel()
+            await batches.aclose()
 
     end_time = time.time()
     total_time = end_time - start_time
@@ -250,36 +375,54 @@ async def process_concepts(
 
 
 class AsyncBatchIterator:
+    """Iterate a cursor in batches, fetching the next batch in the background."""
+
     def __init__(self, cursor, batch_size):
         self.cursor = cursor
         self.batch_size = batch_size
+        self._next_batch = None
 
     def __aiter__(self):
         return self
 
+    def _prefetch(self):
+        self._next_batch = asyncio.ensure_future(
+            self.cursor.to_list(length=self.batch_size)
+        )
+
     async def __anext__(self):
-        batch = await self.cursor.to_list(length=self.batch_size)
+        if self._next_batch is None:
+            self._prefetch()
+        batch = await self._next_batch
         if not batch:
+            self._next_batch = None
             raise StopAsyncIteration
+        # Start the next getMore while the caller processes this batch
+        self._prefetch()
         return batch
 
+    async def aclose(self):
+        """Cancel any in-flight prefetch."""
+        if self._next_batch is not None:
+            self._next_batch.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                try:
+                    await self._next_batch
+                except Exception as e:
+                    logger.warning(f"Prefetched Mongo batch failed: {e}")
+            self._next_batch = None
+
 
 async def main(recreate_collection: bool):
     mongo_client = AsyncIOMotorClient(MONGO_URI)
     milvus_manager = MilvusManager(MILVUS_HOST, MILVUS_PORT)
     embedding_manager = EmbeddingManager(EMBEDDING_SERVICE_URL)
 
-    milvus_manager.connect()
-
     try:
-        if recreate_collection:
-            utility.drop_collection(milvus_manager.collection_name)
-            logger.info(
-                f"Dropped existing collection: {milvus_manager.collection_name}"
-            )
-
-        milvus_manager.collection = milvus_manager.get_or_create_collection(
-            dim=VECTOR_DIM
+        # Loading a large collection can take seconds; warm up Mongo meanwhile
+        await asyncio.gather(
+            asyncio.to_thread(milvus_manager.setup, VECTOR_DIM, recreate_collection),
+            mongo_client[MONGO_DB_NAME].command("ping"),
         )
         await process_concepts(
             mongo_client, milvus_manager, embedding_manager, recreate_collection
@@ -287,6 +430,7 @@ async def main(recreate_collection: bool):
     except Exception as e:
         logger.error(f"An error occurred during processing: {e}")
     finally:
+        milvus_manager.finalize()
         await embedding_manager.close()
         connections.disconnect(MILVUS_HOST)
 
@@ -5,7 +5,7 @@ from typing import Dict
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from api.routes import router
+from api.routes import router, start_ner_pool, stop_ner_pool
 
 
 app = FastAPI()
@@ -22,6 +22,18 @@ app.add_middleware(
 app.include_router(router)
 
 
+@app.on_event("startup")
+async def startup_event() -> None:
+    """Start the MedCAT worker processes."""
+    app.state.ner_pool = start_ner_pool()
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    """Stop the MedCAT worker processes."""
+    stop_ner_pool(app.state.ner_pool)
+
+
 @app.get("/health")
 async def health() -> Dict[str, str]:
     """
@@ -1,11 +1,15 @@
 """Clinical NER Service API routes."""
 
+import asyncio
 import logging
+import multiprocessing
 import os
-from typing import Any, Dict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
 
 import spacy
-from fastapi import APIRouter, Body, HTTPException, status
+from fastapi import APIRouter, Body, HTTPException, Request, status
 from medcat.cat import CAT
 
 from api.entities.data import Entity, MetaAnnotation, NERResponse
@@ -21,6 +25,20 @@ MEDCAT_MODELS_DIR = os.getenv("MEDCAT_MODELS_DIR", "/app/medcat_models")
 SELECTED_MODEL = os.getenv(
     "SELECTED_MEDCAT_MODEL", "umls_sm_pt2ch_533bab5115c6c2d6.zip"
 )
+# Each worker process holds its own copy of the MedCAT model in memory
+NER_WORKERS = int(os.getenv("NER_WORKERS", "2"))
+
+
+def ensure_spacy_model() -> None:
+    """Make sure the spaCy model required by MedCAT is installed."""
+    try:
+        spacy.load("en_core_web_md")
+    except OSError:
+        logger.error("Required spaCy model 'en_core_web_md' is not installed.")
+        logger.info("Attempting to download 'en_core_web_md'...")
+        spacy.cli.download("en_core_web_md")  # type: ignore
+        logger.info("Download completed. Retrying model load.")
+        spacy.load("en_core_web_md")
 
 
 def load_medcat_model() -> CAT:
@@ -40,15 +58,6 @@ def load_medcat_model() -> CAT:
         If there's an error loading the model.
     """
     try:
-        try:
-            spacy.load("en_core_web_md")
-        except OSError:
-            logger.error("Required spaCy model 'en_core_web_md' is not installed.")
-            logger.info("Attempting to download 'en_core_web_md'...")
-            spacy.cli.download("en_core_web_md")  # type: ignore
-            logger.info("Download completed. Retrying model load.")
-            spacy.load("en_core_web_md")
-
         model_path = os.path.join(MEDCAT_MODELS_DIR, SELECTED_MODEL)
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"MedCAT model not found: {model_path}")
@@ -59,12 +68,79 @@ def load_medcat_model() -> CAT:
         raise
 
 
-# Load MedCAT model
-try:
-    cat = load_medcat_model()
-except Exception as e:
-    logger.error(f"Failed to initialize MedCAT: {str(e)}")
-    cat = None
+class WorkerState:
+    """State of a MedCAT pool worker process."""
+
+    cat: Optional[CAT] = None
+
+
+# MedCAT model of the current worker process
+worker_state = WorkerState()
+
+
+def init_worker() -> None:
+    """Load the MedCAT model in a pool worker process."""
+    worker_state.cat = load_medcat_model()
+
+
+def get_entities(text: str) -> Dict[str, Any]:
+    """
+    Run MedCAT entity extraction in a pool worker process.
+
+    Parameters
+    ----------
+    text : str
+        The medical note text to extract entities from.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The raw MedCAT output.
+    """
+    return worker_state.cat.get_entities(text)
+
+
+def start_ner_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Start the MedCAT worker pool and wait for every worker to load the model.
+
+    Returns
+    -------
+    Optional[ProcessPoolExecutor]
+        The worker pool, or None if the model cannot be loaded, in which case
+        the extraction endpoint responds with 503.
+    """
+    pool = None
+    try:
+        ensure_spacy_model()
+        pool = ProcessPoolExecutor(
+            max_workers=NER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+        )
+        for future in [pool.submit(os.getpid) for _ in range(NER_WORKERS)]:
+            future.result()
+    except Exception as e:
+        logger.error(f"Failed to initialize MedCAT: {str(e)}")
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        return None
+
+    logger.info(f"Started {NER_WORKERS} MedCAT worker processes")
+    return pool
+
+
+def stop_ner_pool(pool: Optional[ProcessPoolExecutor]) -> None:
+    """
+    Shut down the MedCAT worker pool.
+
+    Parameters
+    ----------
+    pool : Optional[ProcessPoolExecutor]
+        The worker pool returned by start_ner_pool.
+    """
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
 
 
 def process_entity(entity: Dict[str, Any]) -> Entity:
@@ -81,32 +157,43 @@ def process_entity(entity: Dict[str, Any]) -> Entity:
     Entity
         The processed Entity object.
     """
-    return Entity(
+    # MedCAT output is trusted, so skip validation; similarity scores may be
+    # numpy floats and are converted explicitly
+    return Entity.construct(
         pretty_name=entity["pretty_name"],
         cui=entity["cui"],
         type_ids=entity["type_ids"],
         types=entity["types"],
         source_value=entity["source_value"],
         detected_name=entity["detected_name"],
-        acc=entity["acc"],
-        context_similarity=entity["context_similarity"],
+        acc=float(entity["acc"]),
+        context_similarity=float(entity["context_similarity"]),
         start=entity["start"],
         end=entity["end"],
         icd10=entity["icd10"],
         ontologies=entity["ontologies"],
         snomed=entity["snomed"],
         id=entity["id"],
-        meta_anns={k: MetaAnnotation(**v) for k, v in entity["meta_anns"].items()},
+        meta_anns={
+            k: MetaAnnotation.construct(
+                value=v["value"], confidence=float(v["confidence"]), name=v["name"]
+            )
+            for k, v in entity["meta_anns"].items()
+        },
     )
 
 
 @router.post("/extract_entities", response_model=NERResponse)
-async def extract_entities(text: str = Body(..., embed=True)) -> NERResponse:
+async def extract_entities(
+    request: Request, text: str = Body(..., embed=True)
+) -> NERResponse:
     """
     Extract entities from a medical note.
 
     Parameters
     ----------
+    request : Request
+        The incoming request, used to reach the app's MedCAT worker pool.
     text : str
         The medical note text to extract entities from.
 
@@ -120,15 +207,18 @@ async def extract_entities(text: str = Body(..., embed=True)) -> NERResponse:
     HTTPException
         If the MedCAT model is not available or if there's an unexpected error.
     """
-    if cat is None:
+    ner_pool = getattr(request.app.state, "ner_pool", None)
+    if ner_pool is None:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="MedCAT model is not available. Please check the logs for more information.",
         )
 
     try:
-        # Use MedCAT for entity extraction
-        entities_dict = cat.get_entities(text)
+        # Use MedCAT for entity extraction in a worker process
+        entities_dict = await asyncio.get_running_loop().run_in_executor(
+            ner_pool, get_entities, text
+        )
 
         # Process entities
         medcat_entities = [
@@ -136,8 +226,14 @@ async def extract_entities(text: str = Body(..., embed=True)) -> NERResponse:
         ]
 
         logger.info(f"Extracted {len(medcat_entities)} entities from the provided text")
-        return NERResponse(text=text, entities=medcat_entities)
+        return NERResponse.construct(text=text, entities=medcat_entities)
 
+    except BrokenProcessPool as e:
+        logger.error(f"MedCAT worker pool is broken: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="MedCAT model is not available. Please check the logs for more information.",
+        ) from e
     except Exception as e:
         logger.error(f"Unexpected error in extract_entities: {str(e)}", exc_info=True)
         raise HTTPException(
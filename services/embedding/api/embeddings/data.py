@@ -27,3 +27,18 @@ class EmbeddingResponse(BaseModel):
     """
 
     embeddings: List[List[float]]
+
+
+class EncodedEmbeddingResponse(BaseModel):
+    """Encoded embedding response data model.
+
+    Attributes
+    ----------
+    embeddings: str
+        The embeddings of the texts as base64-encoded row-major float16 bytes.
+    dim: int
+        The dimension of each embedding.
+    """
+
+    embeddings: str
+    dim: int
@@ -1,11 +1,12 @@
 """Embedding Service main application."""
 
+import asyncio
 from typing import Dict
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from api.routes import router, initialize_model
+from api.routes import router, initialize_model, start_batch_worker
 
 # Initialize the model before creating the FastAPI app
 initialize_model()
@@ -23,6 +24,13 @@ app.add_middleware(
 app.include_router(router)
 
 
+@app.on_event("startup")
+async def startup_event() -> None:
+    """Start the background worker that batches embedding requests."""
+    app.state.request_queue = asyncio.Queue()
+    app.state.batch_worker = start_batch_worker(app.state.request_queue)
+
+
 @app.get("/health")
 async def health() -> Dict[str, str]:
     """Health check endpoint."""
@@ -1,17 +1,35 @@
 """Embedding Service API routes."""
 
+import asyncio
+import base64
 import logging
 import os
-from typing import Dict, List
+import struct
+from typing import Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import torch
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from sentence_transformers import SentenceTransformer
 
-from api.embeddings.data import EmbeddingRequest, EmbeddingResponse
+from api.embeddings.data import (
+    EmbeddingRequest,
+    EmbeddingResponse,
+    EncodedEmbeddingResponse,
+)
 
 # Increase batch size
 BATCH_SIZE = int(os.getenv("BATCH_SIZE", "32"))
+# How long the batch worker waits to coalesce concurrent requests (seconds)
+MAX_BATCH_WAIT = float(os.getenv("MAX_BATCH_WAIT", "0.005"))
+
+DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+# Compile the transformer forward with torch.compile (GPU only)
+TORCH_COMPILE = os.getenv("TORCH_COMPILE", "false").lower() == "true"
+# Response encoding that returns embeddings as base64 float16 bytes
+FP16_BASE64_ENCODING = "fp16b64"
+# Accept type for raw float32 embeddings behind a "<II" (count, dim) header
+BINARY_MEDIA_TYPE = "application/octet-stream"
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -30,8 +48,25 @@ def load_model() -> SentenceTransformer:
     logger.info("Loading model...")
     model_id = "pritamdeka/S-PubMedBert-MS-MARCO"
 
-    model = SentenceTransformer(model_id)
+    # Use PyTorch's fused scaled-dot-product attention instead of eager attention
+    model = SentenceTransformer(
+        model_id, device=DEVICE, model_kwargs={"attn_implementation": "sdpa"}
+    )
+    if DEVICE == "cuda":
+        # Half precision halves weight and activation traffic on GPU
+        model.half()
+        if TORCH_COMPILE:
+            transformer = model[0]
+            transformer.auto_model = torch.compile(
+                transformer.auto_model, mode="reduce-overhead", dynamic=True
+            )
+    else:
+        # Dynamic INT8 quantization of the linear layers for CPU inference
+        model = torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
 
+    model.eval()
     logger.info("Model loaded successfully")
     return model
 
@@ -40,7 +75,48 @@ def load_model() -> SentenceTransformer:
 model = None
 
 
-@torch.no_grad()
+class PinnedHostBuffer:
+    """Pinned host memory reused for device-to-host copies of embeddings."""
+
+    def __init__(self) -> None:
+        self.buffer: Optional[torch.Tensor] = None
+
+    def get(self, num_rows: int, dim: int, dtype: torch.dtype) -> torch.Tensor:
+        """
+        Get a pinned view of the given shape and dtype.
+
+        The buffer is allocated on first use and grown if needed.
+
+        Parameters
+        ----------
+        num_rows: int
+            The number of rows needed.
+        dim: int
+            The embedding dimension.
+        dtype: torch.dtype
+            The dtype of the embeddings.
+
+        Returns
+        -------
+        torch.Tensor
+            A (num_rows, dim) view of the pinned buffer.
+        """
+        if (
+            self.buffer is None
+            or self.buffer.size(0) < num_rows
+            or self.buffer.size(1) != dim
+            or self.buffer.dtype != dtype
+        ):
+            self.buffer = torch.empty(
+                (max(BATCH_SIZE, num_rows), dim), dtype=dtype, pin_memory=True
+            )
+        return self.buffer[:num_rows]
+
+
+host_buffer = PinnedHostBuffer()
+
+
+@torch.inference_mode()
 def process_batch(texts: List[str]) -> List[List[float]]:
     """Process a batch of texts.
 
@@ -54,44 +130,215 @@ def process_batch(texts: List[str]) -> List[List[float]]:
     List[List[float]]
         The embeddings of the texts.
     """
-    global model
+    # Get embeddings; the model was placed on DEVICE once at load time
+    embeddings = model.encode(texts, convert_to_tensor=True, device=DEVICE)
+    if DEVICE != "cuda":
+        return embeddings.float().numpy().tolist()
+
+    # Copy in the model's dtype (FP16 on GPU) into pinned memory and upcast on
+    # the host
+    num_texts, dim = embeddings.shape
+    host_embeddings = host_buffer.get(num_texts, dim, embeddings.dtype)
+    host_embeddings.copy_(embeddings, non_blocking=True)
+    torch.cuda.current_stream().synchronize()
+
+    return host_embeddings.float().numpy().tolist()
+
 
-    # Move model to GPU if available
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    model.to(device)
+def embed_texts(texts: List[str], batch_size: int = BATCH_SIZE) -> List[List[float]]:
+    """Embed a list of texts in batches.
 
-    # Get embeddings
-    embeddings = model.encode(texts, convert_to_tensor=True, device=device)
+    Texts are sorted by length before batching so each batch pads to a
+    similar length, and the embeddings are returned in the original order.
+    A batch that runs out of GPU memory is retried in halves after releasing
+    the allocator's cached blocks.
 
-    return embeddings.cpu().numpy().tolist()
+    Parameters
+    ----------
+    texts: List[str]
+        The texts to embed.
+    batch_size: int
+        The number of texts per forward pass.
 
+    Returns
+    -------
+    List[List[float]]
+        The embeddings of the texts.
+    """
+    # Character length is a cheap proxy for token length
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    sorted_texts = [texts[i] for i in order]
+
+    sorted_embeddings = []
+    for i in range(0, len(sorted_texts), batch_size):
+        batch = sorted_texts[i : i + batch_size]
+        try:
+            batch_embeddings = process_batch(batch)
+        except torch.cuda.OutOfMemoryError:
+            if len(batch) == 1:
+                raise
+            logger.warning(f"CUDA OOM on batch of {len(batch)}, retrying in halves")
+            torch.cuda.empty_cache()
+            batch_embeddings = embed_texts(batch, batch_size=len(batch) // 2)
+        sorted_embeddings.extend(batch_embeddings)
+
+    all_embeddings: List[List[float]] = [[] for _ in texts]
+    for position, embedding in zip(order, sorted_embeddings):
+        all_embeddings[position] = embedding
+    return all_embeddings
+
+
+# Queue of pending requests, consumed by the batch worker
+RequestQueue = asyncio.Queue[Tuple[List[str], asyncio.Future]]
+
+
+async def batch_worker(request_queue: RequestQueue) -> None:
+    """Coalesce concurrent embedding requests into shared forward passes.
+
+    Waits for a request, then keeps collecting queued requests for up to
+    MAX_BATCH_WAIT seconds or until BATCH_SIZE texts are gathered, embeds
+    all of them in a worker thread and resolves each request's future with
+    its slice of the result.
+
+    Parameters
+    ----------
+    request_queue: RequestQueue
+        The queue of pending requests and their futures.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        texts, future = await request_queue.get()
+        pending = [(texts, future)]
+        num_texts = len(texts)
+        deadline = loop.time() + MAX_BATCH_WAIT
+        while num_texts < BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                texts, future = await asyncio.wait_for(request_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            pending.append((texts, future))
+            num_texts += len(texts)
 
-@router.post("/embeddings", response_model=EmbeddingResponse)
-async def create_embeddings(request: EmbeddingRequest) -> Dict[str, List[List[float]]]:
+        all_texts = [text for texts, _ in pending for text in texts]
+        try:
+            embeddings = await asyncio.to_thread(embed_texts, all_texts)
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+
+        offset = 0
+        for texts, future in pending:
+            if not future.done():
+                future.set_result(embeddings[offset : offset + len(texts)])
+            offset += len(texts)
+
+
+def start_batch_worker(request_queue: RequestQueue) -> asyncio.Task:
+    """Start the batch worker on a request queue.
+
+    Parameters
+    ----------
+    request_queue: RequestQueue
+        The queue the endpoint puts pending requests on.
+
+    Returns
+    -------
+    asyncio.Task
+        The running batch worker task.
+    """
+    return asyncio.create_task(batch_worker(request_queue))
+
+
+def encode_fp16_base64(embeddings: List[List[float]]) -> Dict[str, Union[str, int]]:
+    """Encode embeddings as base64 float16 bytes.
+
+    Parameters
+    ----------
+    embeddings: List[List[float]]
+        The embeddings to encode.
+
+    Returns
+    -------
+    Dict[str, Union[str, int]]
+        The encoded embeddings and their dimension.
+    """
+    array = np.asarray(embeddings, dtype=np.float16)
+    return {
+        "embeddings": base64.b64encode(array.tobytes()).decode("ascii"),
+        "dim": array.shape[1] if array.ndim == 2 else 0,
+    }
+
+
+def encode_float32_binary(embeddings: List[List[float]]) -> bytes:
+    """Encode embeddings as little-endian float32 bytes.
+
+    Parameters
+    ----------
+    embeddings: List[List[float]]
+        The embeddings to encode.
+
+    Returns
+    -------
+    bytes
+        A "<II" header holding the number of embeddings and their dimension,
+        followed by the row-major float32 values.
+    """
+    array = np.asarray(embeddings, dtype="<f4")
+    dim = array.shape[1] if array.ndim == 2 else 0
+    return struct.pack("<II", len(embeddings), dim) + array.tobytes()
+
+
+@router.post(
+    "/embeddings",
+    response_model=Union[EmbeddingResponse, EncodedEmbeddingResponse],
+)
+async def create_embeddings(
+    request: EmbeddingRequest, http_request: Request, encoding: Optional[str] = None
+) -> Union[Dict[str, Union[List[List[float]], str, int]], Response]:
     """Create embeddings for a list of texts.
 
     Parameters
     ----------
     request: EmbeddingRequest
         The request containing the texts.
+    http_request: Request
+        The incoming HTTP request; an "application/octet-stream" Accept
+        header returns the embeddings as raw float32 bytes.
+    encoding: Optional[str]
+        Set to "fp16b64" to return the embeddings as base64 float16 bytes
+        instead of JSON float lists. Cannot be combined with an
+        "application/octet-stream" Accept header.
 
     Returns
     -------
-    Dict[str, List[List[float]]]
+    Union[Dict[str, Union[List[List[float]], str, int]], Response]
         The embeddings of the texts.
     """
+    if encoding is not None and encoding != FP16_BASE64_ENCODING:
+        raise HTTPException(status_code=400, detail=f"Unsupported encoding: {encoding}")
+    binary = BINARY_MEDIA_TYPE in http_request.headers.get("accept", "")
+    if binary and encoding is not None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Encoding {encoding} conflicts with Accept: {BINARY_MEDIA_TYPE}",
+        )
     try:
-        all_embeddings = []
-        for i in range(0, len(request.texts), BATCH_SIZE):
-            batch = request.texts[i : i + BATCH_SIZE]
-            batch_embeddings = process_batch(batch)
-            all_embeddings.extend(batch_embeddings)
-
-            # Clear CUDA cache to free up memory
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
-
-        return {"embeddings": all_embeddings}
+        future = asyncio.get_running_loop().create_future()
+        await http_request.app.state.request_queue.put((request.texts, future))
+        embeddings = await future
+        if binary:
+            return Response(
+                content=encode_float32_binary(embeddings),
+                media_type=BINARY_MEDIA_TYPE,
+            )
+        if encoding == FP16_BASE64_ENCODING:
+            return encode_fp16_base64(embeddings)
+        return {"embeddings": embeddings}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
@@ -100,3 +347,10 @@ def initialize_model():
     """Initialize the model."""
     global model
     model = load_model()
+
+    if DEVICE == "cuda" and TORCH_COMPILE:
+        # Warm up on a short and a long input so compilation happens at startup
+        logger.info("Warming up compiled model...")
+        process_batch(["warmup"])
+        process_batch(["warmup " * 256])
+        logger.info("Warmup complete")
@@ -22,6 +22,14 @@ interface AuthContextType {
 
 const AuthContext = createContext<AuthContextType | undefined>(undefined)
 
+// FastAPI sends request validation errors as a list of { msg } objects
+const formatErrorDetail = (detail: unknown): string | undefined => {
+  if (Array.isArray(detail)) {
+    return detail.map((error) => error?.msg ?? String(error)).join('; ')
+  }
+  return typeof detail === 'string' ? detail : undefined
+}
+
 export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children }) => {
   const [user, setUser] = useState<User | null>(null)
   const [isLoading, setIsLoading] = useState(true)
@@ -71,7 +79,7 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
 
       if (!response.ok) {
         const errorData = await response.json()
-        throw new Error(errorData.detail || 'Login failed')
+        throw new Error(formatErrorDetail(errorData.detail) || 'Login failed')
       }
 
       const data = await response.json()
@@ -124,7 +132,7 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
 
       if (!response.ok) {
         const errorData = await response.json()
-        throw new Error(errorData.detail || 'Failed to update password')
+        throw new Error(formatErrorDetail(errorData.detail) || 'Failed to update password')
       }
     } catch (error) {
       console.error('Error updating password:', error)